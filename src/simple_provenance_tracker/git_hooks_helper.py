@@ -3,6 +3,7 @@
 Standalone git hooks helper for AI provenance tracking.
 
 Intentionally uses only stdlib — no venv required, no external dependencies.
+orjson is picked up for config parsing when installed, but never required.
 Called by the global git hooks (prepare-commit-msg, post-commit).
 
 Usage:
@@ -10,26 +11,49 @@ Usage:
     python3 git_hooks_helper.py post-commit <repo_path> <commit_hash>
 """
 
-import json
 import os
 import sqlite3
 import subprocess
 import sys
 from datetime import datetime, timezone
-from pathlib import Path
 
+# orjson is an optional accelerator (pip install simple-ai-provenance[fast])
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
-DB_PATH = Path.home() / ".claude" / "provenance" / "provenance.db"
+
+_CLAUDE_DIR = os.path.join(os.path.expanduser("~"), ".claude")
+DB_PATH = os.path.join(_CLAUDE_DIR, "provenance", "provenance.db")
 
 
 # ─── Database helpers ─────────────────────────────────────────────────────────
 
+_conn = None
+
+
 def _connect() -> sqlite3.Connection:
-    if not DB_PATH.exists():
-        return None
-    conn = sqlite3.connect(str(DB_PATH), timeout=3)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Shared connection for this hook process; None until the DB exists."""
+    global _conn
+    if _conn is None and os.path.exists(DB_PATH):
+        _conn = sqlite3.connect(DB_PATH, timeout=3)
+        _conn.row_factory = sqlite3.Row
+    return _conn
+
+
+def has_uncommitted_prompts(repo_path: str) -> bool:
+    """Cheap index probe — lets non-Claude commits skip the full query."""
+    conn = _connect()
+    if conn is None:
+        return False
+    try:
+        return conn.execute(
+            "SELECT 1 FROM prompts WHERE repo_path = ? AND committed = 0 LIMIT 1",
+            (repo_path,),
+        ).fetchone() is not None
+    except Exception:
+        return False
 
 
 def get_uncommitted_prompts(repo_path: str):
@@ -39,7 +63,8 @@ def get_uncommitted_prompts(repo_path: str):
     try:
         rows = conn.execute(
             """
-            SELECT p.*, s.started_at AS session_started
+            SELECT p.session_id, p.timestamp, p.prompt_text,
+                   s.started_at AS session_started
             FROM   prompts p
             LEFT JOIN sessions s USING (session_id)
             WHERE  p.repo_path = ? AND p.committed = 0
@@ -50,8 +75,6 @@ def get_uncommitted_prompts(repo_path: str):
         return rows
     except Exception:
         return []
-    finally:
-        conn.close()
 
 
 def mark_committed(repo_path: str, commit_hash: str) -> int:
@@ -71,50 +94,67 @@ def mark_committed(repo_path: str, commit_hash: str) -> int:
         return cur.rowcount
     except Exception:
         return 0
-    finally:
-        conn.close()
 
 
 # ─── Formatting ───────────────────────────────────────────────────────────────
 
 def _fmt_ts(ts: str) -> str:
     try:
-        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        # fromisoformat() before 3.11 rejects a "Z" suffix
+        if ts.endswith("Z"):
+            ts = ts[:-1] + "+00:00"
+        dt = datetime.fromisoformat(ts)
         return dt.astimezone().strftime("%Y-%m-%d %H:%M")
     except Exception:
         return ts
 
 
+def _git_diff_names(repo_path: str, *args: str):
+    r = subprocess.run(
+        ["git", "diff", "--name-only", "-z", *args],
+        cwd=repo_path, capture_output=True, timeout=5, close_fds=False,
+        stdin=subprocess.DEVNULL,
+        # Read-only: don't take index.lock for a stat refresh mid-commit
+        env={**os.environ, "GIT_OPTIONAL_LOCKS": "0"},
+    )
+    if r.returncode != 0:
+        return []
+    return [f.decode("utf-8", errors="replace") for f in r.stdout.split(b"\0") if f]
+
+
 def _git_changed_files(repo_path: str):
+    """Staged files, or all changed tracked files if nothing is staged."""
     try:
-        r = subprocess.run(
-            ["git", "diff", "--cached", "--name-only"],
-            cwd=repo_path, capture_output=True, text=True, timeout=5,
-        )
-        staged = [f for f in r.stdout.strip().splitlines() if f]
+        staged = _git_diff_names(repo_path, "--cached")
 
         # Also include unstaged tracked files if nothing staged
         if not staged:
-            r2 = subprocess.run(
-                ["git", "diff", "--name-only", "HEAD"],
-                cwd=repo_path, capture_output=True, text=True, timeout=5,
-            )
-            staged = [f for f in r2.stdout.strip().splitlines() if f]
+            staged = _git_diff_names(repo_path, "HEAD")
 
         return staged
     except Exception:
         return []
 
 
-_CONFIG_PATH = Path.home() / ".claude" / "simple-ai-provenance-config.json"
+_CONFIG_PATH = os.path.join(_CLAUDE_DIR, "simple-ai-provenance-config.json")
 _DEFAULT_THRESHOLD = 5
 
 
 def _load_threshold() -> int:
-    """Read verbose_threshold from config file. Falls back to default if absent or malformed."""
+    """Read verbose_threshold from config file. Falls back to default if absent or malformed.
+
+    PROVENANCE_VERBOSE_THRESHOLD in the environment takes precedence and
+    skips the config read entirely.
+    """
+    env = os.environ.get("PROVENANCE_VERBOSE_THRESHOLD")
+    if env:
+        try:
+            return int(env)
+        except ValueError:
+            pass
     try:
-        with open(_CONFIG_PATH) as f:
-            cfg = json.load(f)
+        with open(_CONFIG_PATH, "rb") as f:
+            cfg = _json_loads(f.read())
         value = cfg.get("settings", {}).get("verbose_threshold", _DEFAULT_THRESHOLD)
         return int(value)
     except Exception:
@@ -148,6 +188,8 @@ def build_provenance_block(repo_path: str) -> str:
     > 5 prompts  →  condensed: count, duration, first + last prompt only
     Full detail is always queryable via `get_session_summary` MCP tool.
     """
+    if not has_uncommitted_prompts(repo_path):
+        return ""
     prompts = get_uncommitted_prompts(repo_path)
     if not prompts:
         return ""
@@ -173,9 +215,11 @@ def build_provenance_block(repo_path: str) -> str:
         # ── Verbose mode ────────────────────────────────────────────────
         for idx, (sid, data) in enumerate(sessions.items(), 1):
             started = _fmt_ts(data["started"])
-            n = len(data["prompts"])
-            lines.append(f"# Session {idx}  ({started}, id: {sid[:8]}, {n} prompt{'s' if n > 1 else ''})")
-            for p in data["prompts"]:
+            ps = data["prompts"]
+            n = len(ps)
+            plural = "s" if n > 1 else ""
+            lines.append(f"# Session {idx}  ({started}, id: {sid[:8]}, {n} prompt{plural})")
+            for p in ps:
                 lines.append(f"#   • {_truncate(p['prompt_text'])}")
             lines.append("#")
     else:
@@ -186,7 +230,8 @@ def build_provenance_block(repo_path: str) -> str:
         dur = _duration_str(first_ts, last_ts)
         span = f" over {dur}" if dur else ""
 
-        lines.append(f"# {total} prompts · {len(sessions)} session{'s' if len(sessions) > 1 else ''}{span}")
+        n_sessions = len(sessions)
+        lines.append(f"# {total} prompts · {n_sessions} session{'s' if n_sessions > 1 else ''}{span}")
         lines.append("#")
 
         # Per-session one-liner
@@ -232,8 +277,11 @@ def cmd_prepare_commit_msg(args):
         sys.exit(0)
 
     try:
-        with open(commit_msg_file, "a") as f:
-            f.write(block + "\n")
+        fd = os.open(commit_msg_file, os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, (block + "\n").encode("utf-8"))
+        finally:
+            os.close(fd)
     except Exception:
         pass  # Never fail a commit
 
@@ -0,0 +1,215 @@
+"""Repo root / branch / HEAD lookup shared by the hooks and the MCP server.
+
+Uses pygit2 (libgit2, in-process) when installed, otherwise falls back to
+`git rev-parse` subprocesses. Both paths return the same values so prompts
+recorded either way line up with what the bash git hooks pass in.
+"""
+
+import os
+import subprocess
+from typing import Tuple
+
+# pygit2 is an optional accelerator (pip install simple-ai-provenance[fast])
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+
+# Every lookup here is read-only: never prompt for credentials, and don't
+# take index.lock just to refresh stat info (it races with the user's git)
+GIT_ENV = {**os.environ, "GIT_OPTIONAL_LOCKS": "0", "GIT_TERMINAL_PROMPT": "0"}
+
+
+def _rev_parse(cwd: str, *args: str) -> str:
+    """Stripped stdout of `git rev-parse <args>` in cwd, or "" on any failure."""
+    try:
+        # stdin=DEVNULL: the MCP server's stdin is its JSON-RPC channel
+        r = subprocess.run(
+            ["git", "rev-parse", *args],
+            cwd=cwd, capture_output=True, text=True, timeout=5, close_fds=False,
+            stdin=subprocess.DEVNULL, env=GIT_ENV,
+        )
+        if r.returncode == 0:
+            return r.stdout.strip()
+    except Exception:
+        pass
+    return ""
+
+
+def _open_repo(directory: str):
+    """pygit2 Repository with a working tree containing directory, or None."""
+    if pygit2 is None:
+        return None
+    try:
+        git_dir = pygit2.discover_repository(directory)
+        if git_dir:
+            repo = pygit2.Repository(git_dir)
+            if repo.workdir:
+                return repo
+    except Exception:
+        pass
+    return None
+
+
+def _toplevel(repo) -> str:
+    # `git rev-parse --show-toplevel` resolves symlinks; match it
+    return os.path.realpath(repo.workdir)
+
+
+def _branch(repo) -> str:
+    if repo.head_is_unborn:
+        return "unknown"
+    if repo.head_is_detached:
+        return "HEAD"
+    return repo.head.shorthand
+
+
+def _git_dir(repo_path: str) -> str:
+    """The .git directory for a worktree root, following `gitdir:` files."""
+    dot_git = os.path.join(repo_path, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    with open(dot_git, encoding="utf-8") as f:
+        line = f.readline().strip()
+    if not line.startswith("gitdir: "):
+        raise ValueError(f"unrecognised .git file: {dot_git}")
+    return os.path.join(repo_path, line[8:])
+
+
+def _resolve_ref(git_dir: str, ref: str) -> str:
+    """Contents of a loose ref, or its SHA from packed-refs. "" if it doesn't exist."""
+    common = git_dir
+    try:
+        with open(os.path.join(git_dir, "commondir"), encoding="utf-8") as f:
+            common = os.path.join(git_dir, f.read().strip())
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(common, ref), encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(common, "packed-refs"), encoding="utf-8") as f:
+            for line in f:
+                if line.rstrip("\n").endswith(" " + ref):
+                    return line.split(" ", 1)[0]
+    except OSError:
+        pass
+    return ""
+
+
+def _is_sha(value: str) -> bool:
+    return len(value) in (40, 64) and all(c in "0123456789abcdef" for c in value)
+
+
+def _read_head_branch(repo_path: str) -> str:
+    """Branch name straight from .git/HEAD, matching `git rev-parse --abbrev-ref HEAD`.
+
+    Returns "" when HEAD can't be interpreted so the caller falls back to git.
+    """
+    try:
+        git_dir = _git_dir(repo_path)
+        with open(os.path.join(git_dir, "HEAD"), encoding="utf-8") as f:
+            head = f.read().strip()
+        if head.startswith("ref: refs/heads/"):
+            ref = head[5:]
+            if ref == "refs/heads/.invalid":
+                return ""  # reftable backend — HEAD is a placeholder
+            return ref[11:] if _resolve_ref(git_dir, ref) else "unknown"
+        if _is_sha(head):
+            return "HEAD"  # Detached
+    except Exception:
+        pass
+    return ""
+
+
+def _read_head_sha(repo_path: str) -> str:
+    """SHA of HEAD straight from .git, or "" so the caller falls back to git."""
+    try:
+        git_dir = _git_dir(repo_path)
+        with open(os.path.join(git_dir, "HEAD"), encoding="utf-8") as f:
+            head = f.read().strip()
+        if head.startswith("ref: "):
+            head = _resolve_ref(git_dir, head[5:])
+        if _is_sha(head):
+            return head
+    except Exception:
+        pass
+    return ""
+
+
+_GIT_ENV_OVERRIDES = ("GIT_DIR", "GIT_WORK_TREE", "GIT_CEILING_DIRECTORIES")
+
+
+def _find_toplevel(directory: str) -> str:
+    """Nearest ancestor with a .git dir or file, or "" to defer to git."""
+    if any(k in os.environ for k in _GIT_ENV_OVERRIDES):
+        return ""
+    path = os.path.realpath(directory)
+    if not os.path.isdir(path) or ".git" in path.split(os.sep):
+        return ""  # Inside a git dir; rev-parse has no toplevel to report
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return ""
+        path = parent
+
+
+def repo_root(directory: str) -> str:
+    """Git toplevel containing directory. Falls back to directory itself."""
+    repo = _open_repo(directory)
+    if repo is not None:
+        try:
+            return _toplevel(repo)
+        except Exception:
+            pass
+    top = _find_toplevel(directory)
+    if top:
+        return top
+    return _rev_parse(directory, "--show-toplevel") or directory
+
+
+def current_branch(repo_path: str) -> str:
+    """Short name of the checked-out branch, 'HEAD' if detached, else 'unknown'."""
+    repo = _open_repo(repo_path)
+    if repo is not None:
+        try:
+            return _branch(repo)
+        except Exception:
+            pass
+    branch = _read_head_branch(repo_path)
+    if branch:
+        return branch
+    return _rev_parse(repo_path, "--abbrev-ref", "HEAD") or "unknown"
+
+
+def head_commit(repo_path: str) -> str:
+    """Full SHA of HEAD, or "" if it can't be resolved (e.g. unborn branch)."""
+    repo = _open_repo(repo_path)
+    if repo is not None:
+        try:
+            if not repo.head_is_unborn:
+                return str(repo.head.target)
+            return ""
+        except Exception:
+            pass
+    sha = _read_head_sha(repo_path)
+    if sha:
+        return sha
+    return _rev_parse(repo_path, "HEAD")
+
+
+def repo_and_branch(cwd: str) -> Tuple[str, str]:
+    """Return (repo_root, branch). Falls back to cwd / 'unknown'."""
+    repo = _open_repo(cwd)
+    if repo is not None:
+        try:
+            return _toplevel(repo), _branch(repo)
+        except Exception:
+            pass
+    repo_path = repo_root(cwd)
+    return repo_path, current_branch(repo_path)
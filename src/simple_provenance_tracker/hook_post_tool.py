@@ -19,57 +19,25 @@ Hook stdin format:
 This script must NEVER crash or block — Claude will pause waiting for it.
 """
 
-import json
 import os
 import sqlite3
-import subprocess
 import sys
-from pathlib import Path
 
-
-DB_PATH = Path.home() / ".claude" / "provenance" / "provenance.db"
-TRACKED_TOOLS = {"Write", "Edit", "MultiEdit", "NotebookEdit"}
-
-
-def _get_repo_root(path: str) -> str:
-    directory = str(Path(path).parent)
-    try:
-        r = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"],
-            cwd=directory,
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if r.returncode == 0:
-            return r.stdout.strip()
-    except Exception:
-        pass
-    return directory
+from .git_utils import current_branch, repo_root
+from .transcript_utils import json_loads
 
 
-def _get_branch(repo_path: str) -> str:
-    try:
-        r = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if r.returncode == 0:
-            return r.stdout.strip()
-    except Exception:
-        pass
-    return "unknown"
+_CLAUDE_DIR = os.path.join(os.path.expanduser("~"), ".claude")
+DB_PATH = os.path.join(_CLAUDE_DIR, "provenance", "provenance.db")
+TRACKED_TOOLS = {"Write", "Edit", "MultiEdit", "NotebookEdit"}
 
 
 def main() -> None:
     try:
-        raw = sys.stdin.read()
+        raw = sys.stdin.buffer.read()
         if not raw.strip():
             return
-        data = json.loads(raw)
+        data = json_loads(raw)
     except Exception:
         return
 
@@ -89,14 +57,20 @@ def main() -> None:
         return
 
     # Resolve to absolute path
-    if not Path(file_path).is_absolute():
-        file_path = str(Path(cwd) / file_path)
+    if not os.path.isabs(file_path):
+        file_path = os.path.join(cwd, file_path)
+
+    # Common case: editing a file in the repo we're working in. Decide that
+    # from git alone so the DB is never opened for same-repo edits.
+    file_repo = repo_root(os.path.dirname(file_path))
+    if not file_repo or file_repo == repo_root(cwd):
+        return
 
     try:
-        if not DB_PATH.exists():
+        if not os.path.exists(DB_PATH):
             return  # DB not initialised yet, nothing to cross-reference
 
-        conn = sqlite3.connect(str(DB_PATH), timeout=5)
+        conn = sqlite3.connect(DB_PATH, timeout=5)
         conn.execute("PRAGMA journal_mode=WAL")
 
         # Get session's primary repo
@@ -108,8 +82,7 @@ def main() -> None:
             return
         primary_repo = row[0]
 
-        file_repo = _get_repo_root(file_path)
-        if not file_repo or file_repo == primary_repo:
+        if file_repo == primary_repo:
             conn.close()
             return  # Same repo — no cross-reference needed
 
@@ -123,7 +96,7 @@ def main() -> None:
             return
         prompt_id = row[0]
 
-        branch = _get_branch(file_repo)
+        branch = current_branch(file_repo)
         conn.execute(
             "INSERT OR IGNORE INTO prompt_repos (prompt_id, repo_path, branch_name) VALUES (?, ?, ?)",
             (prompt_id, file_repo, branch),
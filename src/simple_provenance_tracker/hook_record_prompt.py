@@ -17,102 +17,82 @@ Hook stdin format:
 This script must NEVER crash or block — Claude will pause waiting for it.
 """
 
-import json
 import os
 import sqlite3
-import subprocess
 import sys
 import uuid
 from datetime import datetime, timezone
-from pathlib import Path
 
+from .database import DB_PATH, SCHEMA_SQL, SCHEMA_VERSION
+from .git_utils import repo_and_branch
+from .transcript_utils import is_meta, json_loads
 
-DB_PATH = Path.home() / ".claude" / "provenance" / "provenance.db"
+
+_UPSERT_SESSION_SQL = """
+    INSERT INTO sessions (session_id, repo_path, branch_name, cwd, started_at, last_active)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(session_id) DO UPDATE SET
+        last_active  = excluded.last_active,
+        repo_path    = CASE WHEN excluded.repo_path  != '' THEN excluded.repo_path  ELSE sessions.repo_path  END,
+        branch_name  = CASE WHEN excluded.branch_name != '' THEN excluded.branch_name ELSE sessions.branch_name END,
+        cwd          = excluded.cwd
+"""
+
+_INSERT_PROMPT_SQL = """
+    INSERT INTO prompts
+        (prompt_id, session_id, repo_path, branch_name, cwd, prompt_text, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
 
 
 def _init_db(conn: sqlite3.Connection) -> None:
-    conn.executescript("""
-        CREATE TABLE IF NOT EXISTS sessions (
-            session_id   TEXT PRIMARY KEY,
-            repo_path    TEXT NOT NULL DEFAULT '',
-            branch_name  TEXT NOT NULL DEFAULT '',
-            cwd          TEXT NOT NULL DEFAULT '',
-            started_at   TEXT NOT NULL,
-            last_active  TEXT NOT NULL
-        );
-
-        CREATE TABLE IF NOT EXISTS prompts (
-            prompt_id    TEXT PRIMARY KEY,
-            session_id   TEXT NOT NULL,
-            repo_path    TEXT NOT NULL DEFAULT '',
-            branch_name  TEXT NOT NULL DEFAULT '',
-            cwd          TEXT NOT NULL DEFAULT '',
-            prompt_text  TEXT NOT NULL,
-            timestamp    TEXT NOT NULL,
-            committed    INTEGER NOT NULL DEFAULT 0,
-            commit_hash  TEXT
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_prompts_session
-            ON prompts(session_id);
-        CREATE INDEX IF NOT EXISTS idx_prompts_repo
-            ON prompts(repo_path);
-        CREATE INDEX IF NOT EXISTS idx_prompts_uncommitted
-            ON prompts(repo_path, committed)
-            WHERE committed = 0;
-
-        CREATE TABLE IF NOT EXISTS prompt_repos (
-            prompt_id   TEXT NOT NULL,
-            repo_path   TEXT NOT NULL,
-            branch_name TEXT NOT NULL DEFAULT '',
-            PRIMARY KEY (prompt_id, repo_path)
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_prompt_repos_repo
-            ON prompt_repos(repo_path);
-    """)
-
-
-def _get_repo_info(cwd: str):
-    """Return (repo_root, branch). Falls back to cwd / 'unknown'."""
-    repo_path = cwd
-    branch = "unknown"
-    try:
-        r = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"],
-            cwd=cwd, capture_output=True, text=True, timeout=5,
-        )
-        if r.returncode == 0:
-            repo_path = r.stdout.strip()
-    except Exception:
-        pass
-    try:
-        r = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            cwd=repo_path, capture_output=True, text=True, timeout=5,
-        )
-        if r.returncode == 0:
-            branch = r.stdout.strip()
-    except Exception:
-        pass
-    return repo_path, branch
+    # Reading user_version is a header lookup; only run the DDL on a stale schema
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    conn.executescript(SCHEMA_SQL)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _tail_lines(path: str, block: int = 8192):
+    """Yield raw byte lines from the end of a file backwards, one block at a time."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        # Tail pieces of a line that spans blocks, newest first; joined once
+        # its start is found so long lines cost linear, not quadratic, time.
+        pending: list[bytes] = []
+        while pos > 0:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            parts = f.read(step).split(b"\n")
+            if len(parts) == 1:
+                pending.append(parts[0])
+                continue
+            pending.append(parts[-1])
+            yield b"".join(reversed(pending))
+            for line in reversed(parts[1:-1]):
+                yield line
+            # First piece may be a partial line — keep it for the next block
+            pending = [parts[0]]
+        leftover = b"".join(reversed(pending))
+        if leftover:
+            yield leftover
 
 
 def _get_prompt_from_transcript(transcript_path: str) -> str:
     """
     Fallback: read the most recent human text entry from the JSONL transcript.
     Used when the hook data doesn't include the 'prompt' field directly.
+    Reads the file from the end so only the tail of long transcripts is touched.
     """
     try:
-        with open(transcript_path, encoding="utf-8") as f:
-            lines = f.readlines()
         # Walk backwards to find the last user text entry
-        for raw in reversed(lines):
-            raw = raw.strip()
+        for raw in _tail_lines(transcript_path):
             if not raw:
                 continue
             try:
-                entry = json.loads(raw)
+                entry = json_loads(raw)
             except Exception:
                 continue
             if entry.get("type") != "user":
@@ -121,35 +101,25 @@ def _get_prompt_from_transcript(transcript_path: str) -> str:
             content = msg.get("content", "")
             if isinstance(content, str):
                 text = content.strip()
-                if text and not _is_meta(text):
+                if text and not is_meta(text):
                     return text
             elif isinstance(content, list):
                 for item in content:
                     if isinstance(item, dict) and item.get("type") == "text":
                         text = item.get("text", "").strip()
-                        if text and not _is_meta(text):
+                        if text and not is_meta(text):
                             return text
     except Exception:
         pass
     return ""
 
 
-def _is_meta(text: str) -> bool:
-    prefixes = (
-        "[Request interrupted",
-        "The user doesn't want to proceed",
-        "[Skipping",
-        "<system-reminder>",
-    )
-    return any(text.startswith(p) for p in prefixes)
-
-
 def main() -> None:
     try:
-        raw = sys.stdin.read()
+        raw = sys.stdin.buffer.read()
         if not raw.strip():
             return
-        data = json.loads(raw)
+        data = json_loads(raw)
     except Exception:
         return  # Never block Claude
 
@@ -165,34 +135,21 @@ def main() -> None:
     if not prompt_text or not session_id:
         return
 
-    repo_path, branch = _get_repo_info(cwd)
+    repo_path, branch = repo_and_branch(cwd)
     now = datetime.now(timezone.utc).isoformat()
 
     try:
-        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-        conn = sqlite3.connect(str(DB_PATH), timeout=5)
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=5)
         conn.execute("PRAGMA journal_mode=WAL")
         _init_db(conn)
 
         conn.execute(
-            """
-            INSERT INTO sessions (session_id, repo_path, branch_name, cwd, started_at, last_active)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ON CONFLICT(session_id) DO UPDATE SET
-                last_active  = excluded.last_active,
-                repo_path    = CASE WHEN excluded.repo_path  != '' THEN excluded.repo_path  ELSE sessions.repo_path  END,
-                branch_name  = CASE WHEN excluded.branch_name != '' THEN excluded.branch_name ELSE sessions.branch_name END,
-                cwd          = excluded.cwd
-            """,
+            _UPSERT_SESSION_SQL,
             (session_id, repo_path, branch, cwd, now, now),
         )
-
         conn.execute(
-            """
-            INSERT INTO prompts
-                (prompt_id, session_id, repo_path, branch_name, cwd, prompt_text, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
+            _INSERT_PROMPT_SQL,
             (str(uuid.uuid4()), session_id, repo_path, branch, cwd, prompt_text, now),
         )
 
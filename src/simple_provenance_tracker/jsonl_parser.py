@@ -1,8 +1,12 @@
 """Parse Claude Code JSONL transcript files to extract session activity."""
 
-import json
+import os
+from collections import Counter
+from sys import intern
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .transcript_utils import is_meta, json_loads
 
 
 def get_jsonl_path(cwd: str, session_id: str) -> Path:
@@ -11,6 +15,13 @@ def get_jsonl_path(cwd: str, session_id: str) -> Path:
     return Path.home() / ".claude" / "projects" / project_folder / f"{session_id}.jsonl"
 
 
+# Per-transcript parse state, so growing transcripts are only parsed from
+# where the previous call stopped. path -> (offset, mtime_ns, size, result, tail)
+# human_prompts are held as compact (timestamp, text) tuples in here.
+_session_state: Dict[str, Tuple[int, int, int, Dict[str, Any], bytes]] = {}
+_MAX_TRACKED = 128
+
+
 def parse_session_activity(session_id: str, cwd: str) -> Dict[str, Any]:
     """Extract what happened in a session from its JSONL transcript.
 
@@ -20,42 +31,93 @@ def parse_session_activity(session_id: str, cwd: str) -> Dict[str, Any]:
         tools_used      — {tool_name: count}
         bash_commands   — list of bash commands run (truncated)
         human_prompts   — list of {text, timestamp} for human messages
+
+    Transcripts are append-only, so only bytes added since the previous call
+    are parsed. A shrunk or older file is re-read from the start.
     """
-    result: Dict[str, Any] = {
+    path = str(get_jsonl_path(cwd, session_id))
+    try:
+        st = os.stat(path)
+    except OSError:
+        return _snapshot(_new_result())
+
+    state = _session_state.pop(path, None)
+    if state is not None and (st.st_size < state[2] or st.st_mtime_ns < state[1]):
+        state = None  # Truncated or replaced — start over
+
+    if state is None:
+        offset, result, tail = 0, _new_result(), b""
+    else:
+        offset, _, _, result, tail = state
+
+    if state is None or st.st_size != state[2] or st.st_mtime_ns != state[1]:
+        tail = b""
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for raw in f:
+                    # Only consume complete lines; an unterminated last line
+                    # may still be mid-write and is re-read next time
+                    if raw[-1:] != b"\n":
+                        tail = raw
+                        break
+                    offset += len(raw)
+                    _parse_line(raw, result)
+        except OSError:
+            pass
+
+    if len(_session_state) >= _MAX_TRACKED:
+        del _session_state[next(iter(_session_state))]
+    _session_state[path] = (offset, st.st_mtime_ns, st.st_size, result, tail)
+    return _snapshot(result, tail)
+
+
+def _snapshot(result: Dict[str, Any], tail: bytes = b"") -> Dict[str, Any]:
+    """Build the caller-facing dict from parse state, plus any unterminated tail line."""
+    # Hand out fresh containers so callers can't mutate the cached state
+    out = {
+        "files_read": set(result["files_read"]),
+        "files_written": set(result["files_written"]),
+        "tools_used": Counter(result["tools_used"]),
+        "bash_commands": list(result["bash_commands"]),
+        "human_prompts": list(result["human_prompts"]),
+    }
+    if tail:
+        _parse_line(tail, out)
+    out["tools_used"] = dict(out["tools_used"])
+    out["human_prompts"] = [{"text": text, "timestamp": ts} for ts, text in out["human_prompts"]]
+    return out
+
+
+def _new_result() -> Dict[str, Any]:
+    return {
         "files_read": set(),
         "files_written": set(),
-        "tools_used": {},
+        "tools_used": Counter(),
         "bash_commands": [],
         "human_prompts": [],
     }
 
-    jsonl_path = get_jsonl_path(cwd, session_id)
-    if not jsonl_path.exists():
-        return result
 
+def _parse_line(raw: bytes, result: Dict[str, Any]) -> None:
+    """Parse one JSONL entry into result. Malformed entries are skipped."""
+    # No strip(): the JSON parser ignores the trailing newline itself, and
+    # whitespace-only lines fail to parse and are skipped below
+    if len(raw) < 2:
+        return
     try:
-        with open(jsonl_path, encoding="utf-8") as f:
-            for raw in f:
-                raw = raw.strip()
-                if not raw:
-                    continue
-                try:
-                    entry = json.loads(raw)
-                except json.JSONDecodeError:
-                    continue
-
-                entry_type = entry.get("type", "")
-
-                if entry_type == "user":
-                    _extract_human(entry, result)
-                elif entry_type == "assistant":
-                    _extract_tools(entry, result)
+        entry = json_loads(raw)
+        entry_type = entry.get("type", "")
+
+        if entry_type == "user":
+            _extract_human(entry, result)
+        elif entry_type == "assistant":
+            _extract_tools(entry, result)
     except Exception:
         pass
 
-    result["files_read"] = sorted(result["files_read"])
-    result["files_written"] = sorted(result["files_written"])
-    return result
+
+_WRITE_TOOLS = frozenset(("Write", "Edit", "MultiEdit", "NotebookEdit"))
 
 
 def _extract_human(entry: Dict, result: Dict) -> None:
@@ -65,14 +127,15 @@ def _extract_human(entry: Dict, result: Dict) -> None:
 
     if isinstance(content, str):
         text = content.strip()
-        if text and not _is_meta(text):
-            result["human_prompts"].append({"text": text, "timestamp": ts})
+        if text and not is_meta(text):
+            result["human_prompts"].append((ts, text))
     elif isinstance(content, list):
+        add_prompt = result["human_prompts"].append
         for item in content:
             if isinstance(item, dict) and item.get("type") == "text":
                 text = item.get("text", "").strip()
-                if text and not _is_meta(text):
-                    result["human_prompts"].append({"text": text, "timestamp": ts})
+                if text and not is_meta(text):
+                    add_prompt((ts, text))
 
 
 def _extract_tools(entry: Dict, result: Dict) -> None:
@@ -81,35 +144,30 @@ def _extract_tools(entry: Dict, result: Dict) -> None:
     if not isinstance(content, list):
         return
 
+    tools_used = result["tools_used"]
+    add_read = result["files_read"].add
+    add_written = result["files_written"].add
+    add_bash = result["bash_commands"].append
+
     for item in content:
         if not isinstance(item, dict) or item.get("type") != "tool_use":
             continue
 
-        name = item.get("name", "")
+        # A handful of tool names repeat thousands of times; share one str each
+        name = intern(item.get("name", ""))
         inp = item.get("input", {})
 
-        result["tools_used"][name] = result["tools_used"].get(name, 0) + 1
+        tools_used[name] += 1
 
-        if name in ("Read",):
+        if name == "Read":
             fp = inp.get("file_path", "")
             if fp:
-                result["files_read"].add(fp)
-        elif name in ("Write", "Edit", "MultiEdit", "NotebookEdit"):
+                add_read(fp)
+        elif name in _WRITE_TOOLS:
             fp = inp.get("file_path", "")
             if fp:
-                result["files_written"].add(fp)
+                add_written(fp)
         elif name == "Bash":
             cmd = inp.get("command", "")
             if cmd:
-                result["bash_commands"].append(cmd[:120])
-
-
-def _is_meta(text: str) -> bool:
-    """Return True for Claude-internal meta messages, not real user prompts."""
-    prefixes = (
-        "[Request interrupted",
-        "The user doesn't want to proceed",
-        "[Skipping",
-        "<system-reminder>",
-    )
-    return any(text.startswith(p) for p in prefixes)
+                add_bash(cmd[:120])
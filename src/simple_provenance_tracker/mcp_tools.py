@@ -1,158 +1,204 @@
 """MCP tool handler implementations."""
 
+import asyncio
+import copy
 import json
 import os
 import subprocess
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import mcp.types as types
 
 from . import database as db
+from .git_utils import GIT_ENV, current_branch, head_commit, repo_root
 from .jsonl_parser import parse_session_activity
 
+# orjson is an optional accelerator (pip install simple-ai-provenance[fast])
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 CONFIG_PATH = Path.home() / ".claude" / "simple-ai-provenance-config.json"
 _DEFAULT_CONFIG = {"settings": {"verbose_threshold": 5}}
 
 
+# (st_mtime_ns, parsed config) — reparsed only when the file changes
+_config_cache: Optional[Tuple[int, dict]] = None
+
+
 def _load_config() -> dict:
+    global _config_cache
     try:
-        with open(CONFIG_PATH) as f:
-            return json.load(f)
+        mtime = os.stat(CONFIG_PATH).st_mtime_ns
+        if _config_cache is None or _config_cache[0] != mtime:
+            with open(CONFIG_PATH, "rb") as f:
+                data = f.read()
+            cfg = orjson.loads(data) if orjson is not None else json.loads(data)
+            _config_cache = (mtime, cfg)
+        # Callers mutate the result; never hand out the cached dict
+        return copy.deepcopy(_config_cache[1])
     except Exception:
-        return _DEFAULT_CONFIG.copy()
+        return copy.deepcopy(_DEFAULT_CONFIG)
 
 
 def _save_config(cfg: dict) -> None:
+    global _config_cache
     CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(cfg, f, indent=2)
+    # Write-then-rename so a concurrent reader never sees a partial file
+    tmp = CONFIG_PATH.with_name(f"{CONFIG_PATH.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(_dumps(cfg, pretty=True))
         f.write("\n")
+    os.replace(tmp, CONFIG_PATH)
+    # Prime the cache with what we just wrote so the next load skips a reparse
+    _config_cache = (os.stat(CONFIG_PATH).st_mtime_ns, copy.deepcopy(cfg))
+
+
+# The MCP server is long-lived and resolves the same cwd on every tool call,
+# so git lookups are memoised briefly. Short enough that a checkout is seen.
+_GIT_CACHE_TTL = 10.0  # seconds
+# PR ranges are keyed on HEAD's SHA, but the base branch can still move
+_PR_RANGE_TTL = 2.0  # seconds
+_git_cache: Dict[Tuple[str, ...], Tuple[float, Any]] = {}
+
+
+def _git_cached(
+    kind: str, args: Tuple[str, ...], compute: Callable[..., Any], ttl: float = _GIT_CACHE_TTL
+) -> Any:
+    """compute(*args), reused for ttl seconds. Callers must not mutate the result."""
+    key = (kind, *args)
+    now = time.monotonic()
+    hit = _git_cache.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    value = compute(*args)
+    if len(_git_cache) >= 256:
+        _git_cache.clear()
+    _git_cache[key] = (now + ttl, value)
+    return value
 
 
 def _detect_repo(path: str) -> str:
     """Walk up from path to find the git root, fallback to path itself."""
-    try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"],
-            cwd=path,
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode == 0:
-            return result.stdout.strip()
-    except Exception:
-        pass
-    return path
+    return _git_cached("repo", (path,), repo_root)
 
 
 def _current_branch(repo_path: str) -> str:
-    try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode == 0:
-            return result.stdout.strip()
-    except Exception:
-        pass
-    return "unknown"
+    return _git_cached("branch", (repo_path,), current_branch)
 
 
-def _git_diff_stat(repo_path: str) -> str:
-    """Return git diff --stat for staged + unstaged changes."""
+def _run_git(args: List[str], repo_path: str, timeout: float = 10) -> Optional[str]:
+    """stdout of `git -C repo_path <args>`, or None if git failed or couldn't run."""
     try:
+        # Our fds are non-inheritable (PEP 446), so skip the close-all pass;
+        # with close_fds=False CPython can also take the posix_spawn path.
         r = subprocess.run(
-            ["git", "diff", "--stat", "HEAD"],
-            cwd=repo_path,
+            ["git", "-C", repo_path, *args],
             capture_output=True,
-            text=True,
-            timeout=10,
+            timeout=timeout,
+            close_fds=False,
+            stdin=subprocess.DEVNULL,
+            env=GIT_ENV,
         )
-        return r.stdout.strip() if r.returncode == 0 else ""
     except Exception:
-        return ""
+        return None
+    if r.returncode != 0:
+        return None
+    # Paths are bytes to git; one lenient decode instead of a strict
+    # locale-dependent text=True that fails the call on a non-UTF-8 name
+    return r.stdout.decode("utf-8", "replace")
+
+
+def _git_diff_head(repo_path: str) -> Tuple[List[str], str]:
+    """Files changed since HEAD (staged + unstaged) and the `git diff --stat`
+    summary for them, from a single git call."""
+    out = _run_git(["diff", "--numstat", "--stat", "-z", "HEAD"], repo_path)
+    if not out:
+        return [], ""
+    # -z only applies to the numstat records; the --stat text follows the last NUL
+    *records, stat = out.split("\0")
+    files = []
+    it = iter(records)
+    for rec in it:
+        parts = rec.split("\t", 2)  # added, deleted, path
+        if len(parts) < 3:
+            continue
+        path = parts[2]
+        if not path:
+            # Rename/copy: path is empty and old, new follow as separate fields
+            next(it, None)
+            path = next(it, "")
+        files.append(path)
+    return files, stat.strip()
+
+
+def _get_pr_commits(repo_path: str, base_branch: str, head: str = "HEAD") -> List[dict]:
+    """All commits on head not reachable from base_branch."""
+    # NUL between fields and (-z) between commits, so a "|" in a subject is safe
+    out = _run_git(
+        ["log", "-z", "--format=%H%x00%s%x00%ai", f"{base_branch}..{head}"], repo_path
+    )
+    if not out:
+        return []
+    fields = out.split("\0")
+    return [
+        {"hash": h, "subject": subject, "date": date}
+        for h, subject, date in zip(fields[0::3], fields[1::3], fields[2::3])
+    ]
 
 
-def _git_changed_files(repo_path: str) -> List[str]:
-    """Files changed since HEAD (staged + unstaged)."""
-    try:
-        r = subprocess.run(
-            ["git", "diff", "--name-only", "HEAD"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        if r.returncode == 0:
-            return [f for f in r.stdout.strip().splitlines() if f]
-    except Exception:
-        pass
-    return []
+def _git_diff_files_vs_base(repo_path: str, base_branch: str, head: str = "HEAD") -> List[str]:
+    """Files changed between base_branch and head (three-dot diff)."""
+    out = _run_git(["diff", "--name-only", "-z", f"{base_branch}...{head}"], repo_path)
+    return [f for f in out.split("\0") if f] if out else []
 
 
-def _get_pr_commits(repo_path: str, base_branch: str) -> List[dict]:
-    """All commits on HEAD not reachable from base_branch."""
-    try:
-        r = subprocess.run(
-            ["git", "log", f"{base_branch}..HEAD", "--format=%H|%s|%ai"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        commits = []
-        for line in r.stdout.strip().splitlines():
-            parts = line.split("|", 2)
-            if len(parts) == 3:
-                commits.append({"hash": parts[0], "subject": parts[1], "date": parts[2]})
-        return commits
-    except Exception:
-        return []
+_PROMPT_PREVIEW = 120  # chars of each prompt shown in commit / PR blocks
 
 
-def _git_diff_files_vs_base(repo_path: str, base_branch: str) -> List[str]:
-    """Files changed between base_branch and HEAD (three-dot diff)."""
-    try:
-        r = subprocess.run(
-            ["git", "diff", "--name-only", f"{base_branch}...HEAD"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        return [f for f in r.stdout.strip().splitlines() if f]
-    except Exception:
-        return []
+def _truncate(text: str, limit: int = _PROMPT_PREVIEW) -> str:
+    return text[:limit - 3] + "..." if len(text) > limit else text
+
+
+def _group_by_session(prompts) -> Dict[str, List]:
+    """Group prompt rows by session_id, sessions in order of first appearance."""
+    groups: Dict[str, List] = defaultdict(list)
+    for p in prompts:
+        groups[p["session_id"]].append(p)
+    return groups
 
 
 def build_pr_body(repo_path: str, base_branch: str = "main") -> str:
     """Generate the AI provenance block for a PR body. Usable by both MCP and CLI."""
     repo_path = _detect_repo(repo_path)
-    commits = _get_pr_commits(repo_path, base_branch)
-    commit_hashes = [c["hash"] for c in commits]
-
-    committed_prompts = db.get_prompts_for_commits(commit_hashes)
-    uncommitted_prompts = db.get_uncommitted_prompts(repo_path)
-    cross_repo_prompts = db.get_cross_repo_prompts(repo_path)
-
-    # Merge all sources, deduplicate by prompt_id, preserve chronological order
-    seen: set = set()
-    all_prompts = []
-    for p in list(committed_prompts) + list(uncommitted_prompts) + list(cross_repo_prompts):
-        pid = p["prompt_id"]
-        if pid not in seen:
-            seen.add(pid)
-            all_prompts.append(p)
-    all_prompts.sort(key=lambda p: p["timestamp"])
-
-    files_changed = _git_diff_files_vs_base(repo_path, base_branch)
+    # Keyed on the resolved HEAD so a new commit is never served from cache
+    head = head_commit(repo_path) or "HEAD"
+    pr_range = (repo_path, base_branch, head)
+    # The three-dot diff doesn't depend on anything below, so it runs in a
+    # worker thread alongside git log and the database reads.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        files_future = pool.submit(
+            _git_cached, "pr_files", pr_range, _git_diff_files_vs_base, _PR_RANGE_TTL
+        )
+        commits = _git_cached("pr_commits", pr_range, _get_pr_commits, _PR_RANGE_TTL)
+        commit_hashes = [c["hash"] for c in commits]
+
+        # Committed, uncommitted and cross-repo prompts, deduplicated and in
+        # chronological order. One char past the preview is enough for
+        # _truncate to tell if a prompt was cut.
+        all_prompts = db.get_prompts_for_pr(
+            repo_path, commit_hashes, text_limit=_PROMPT_PREVIEW + 1
+        )
+        files_changed = files_future.result()
+
     branch = _current_branch(repo_path)
 
     lines = [
@@ -166,18 +212,10 @@ def build_pr_body(repo_path: str, base_branch: str = "main") -> str:
     if not all_prompts:
         lines.append("_No AI prompts recorded for this branch._")
     else:
-        sessions_seen: Dict[str, List] = {}
-        for p in all_prompts:
-            sessions_seen.setdefault(p["session_id"], []).append(p)
-
-        for idx, (sid, ps) in enumerate(sessions_seen.items(), 1):
+        for idx, (sid, ps) in enumerate(_group_by_session(all_prompts).items(), 1):
             started = _fmt_ts(ps[0]["session_started"] or ps[0]["timestamp"])
             lines.append(f"### Session {idx} — {started} (`{sid[:8]}`)")
-            for p in ps:
-                text = p["prompt_text"]
-                if len(text) > 120:
-                    text = text[:117] + "..."
-                lines.append(f"- {text}")
+            lines.extend("- " + _truncate(p["prompt_text"]) for p in ps)
             lines.append("")
 
     if files_changed:
@@ -193,17 +231,38 @@ def build_pr_body(repo_path: str, base_branch: str = "main") -> str:
     return "\n".join(lines)
 
 
+@lru_cache(maxsize=4096)
 def _fmt_ts(ts: str) -> str:
-    """Format ISO timestamp to readable local form."""
+    """Format ISO timestamp to readable local form.
+
+    Memoised: rows in a response share session start / activity timestamps.
+    """
     try:
-        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        # fromisoformat() before 3.11 rejects a "Z" suffix
+        if ts.endswith("Z"):
+            ts = ts[:-1] + "+00:00"
+        dt = datetime.fromisoformat(ts)
         return dt.astimezone().strftime("%Y-%m-%d %H:%M")
     except Exception:
         return ts
 
 
+# json.dumps() builds a new encoder whenever it's given options; reuse one
+_json_encode = json.JSONEncoder(default=str, ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _dumps(data: Any, pretty: bool = False) -> str:
+    """Compact JSON for tool responses; pretty=True for files people edit."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, default=str, option=option).decode()
+    if pretty:
+        return json.dumps(data, indent=2, default=str, ensure_ascii=False)
+    return _json_encode(data)
+
+
 def _text(data: Any) -> List[types.TextContent]:
-    return [types.TextContent(type="text", text=json.dumps(data, indent=2, default=str))]
+    return [types.TextContent(type="text", text=_dumps(data))]
 
 
 # ─── Tool handlers ────────────────────────────────────────────────────────────
@@ -253,8 +312,8 @@ class MCPToolHandlers:
                 }
                 for p in prompts
             ],
-            "files_written": activity["files_written"],
-            "files_read": activity["files_read"],
+            "files_written": sorted(activity["files_written"]),
+            "files_read": sorted(activity["files_read"]),
             "tools_used": activity["tools_used"],
             "bash_commands_sample": activity["bash_commands"][:10],
         }
@@ -267,16 +326,13 @@ class MCPToolHandlers:
     async def handle_get_uncommitted_work(self, args: Dict[str, Any]) -> List[types.TextContent]:
         """All prompts + git changes since the last commit."""
         repo_path = _detect_repo(args.get("repo_path") or os.getcwd())
+        # Run git diff in a worker thread while we query and format
+        # on this one (the sqlite connection is bound to this thread).
+        git_work = asyncio.create_task(asyncio.to_thread(_git_diff_head, repo_path))
         prompts = db.get_uncommitted_prompts(repo_path)
 
-        # Group prompts by session
-        sessions_seen: Dict[str, List] = {}
-        for p in prompts:
-            sid = p["session_id"]
-            sessions_seen.setdefault(sid, []).append(p)
-
         session_blocks = []
-        for sid, ps in sessions_seen.items():
+        for sid, ps in _group_by_session(prompts).items():
             session_blocks.append({
                 "session_id": sid,
                 "started_at": _fmt_ts(ps[0]["session_started"] or ps[0]["timestamp"]),
@@ -286,8 +342,7 @@ class MCPToolHandlers:
                 ],
             })
 
-        git_files = _git_changed_files(repo_path)
-        git_stat = _git_diff_stat(repo_path)
+        git_files, git_stat = await git_work
 
         return _text({
             "repo_path": repo_path,
@@ -318,24 +373,15 @@ class MCPToolHandlers:
             lines.append("## AI Provenance")
             lines.append("")
 
-            # Group by session
-            sessions_seen: Dict[str, List] = {}
-            for p in prompts:
-                sessions_seen.setdefault(p["session_id"], []).append(p)
-
-            for idx, (sid, ps) in enumerate(sessions_seen.items(), 1):
+            for idx, (sid, ps) in enumerate(_group_by_session(prompts).items(), 1):
                 started = _fmt_ts(ps[0]["session_started"] or ps[0]["timestamp"])
                 lines.append(f"**Session {idx}** ({started}, id: {sid[:8]})")
-                for p in ps:
-                    # Truncate long prompts to keep commit message readable
-                    text = p["prompt_text"]
-                    if len(text) > 120:
-                        text = text[:117] + "..."
-                    lines.append(f"  - {text}")
+                # Truncate long prompts to keep commit message readable
+                lines.extend("  - " + _truncate(p["prompt_text"]) for p in ps)
                 lines.append("")
 
             # Git changes
-            git_files = _git_changed_files(repo_path)
+            git_files, _ = _git_diff_head(repo_path)
             if git_files:
                 lines.append(f"**Files changed:** {', '.join(git_files[:20])}")
                 if len(git_files) > 20:
@@ -356,18 +402,7 @@ class MCPToolHandlers:
 
         if not commit_hash:
             # Try to get HEAD hash automatically
-            try:
-                r = subprocess.run(
-                    ["git", "rev-parse", "HEAD"],
-                    cwd=repo_path,
-                    capture_output=True,
-                    text=True,
-                    timeout=5,
-                )
-                if r.returncode == 0:
-                    commit_hash = r.stdout.strip()
-            except Exception:
-                pass
+            commit_hash = head_commit(repo_path)
 
         if not commit_hash:
             return _text({"error": "Could not determine commit hash. Provide commit_hash explicitly."})
@@ -0,0 +1,25 @@
+"""Transcript / hook-payload helpers shared by the hooks and jsonl_parser.
+
+Kept import-light (no pathlib, no typing) because the hooks load it on every
+prompt and tool call. git_hooks_helper is stdlib-only by design and keeps its
+own copy of the orjson fallback.
+"""
+
+# orjson is an optional accelerator (pip install simple-ai-provenance[fast])
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+
+_META_PREFIXES = (
+    "[Request interrupted",
+    "The user doesn't want to proceed",
+    "[Skipping",
+    "<system-reminder>",
+)
+
+
+def is_meta(text: str) -> bool:
+    """Return True for Claude-internal meta messages, not real user prompts."""
+    return text.startswith(_META_PREFIXES)
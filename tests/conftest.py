@@ -0,0 +1,77 @@
+import os
+import subprocess
+
+import pytest
+
+
+# Keep the user's git config (default branch, hooks, signing) out of the tests
+_GIT_TEST_ENV = {
+    **os.environ,
+    "GIT_CONFIG_GLOBAL": os.devnull,
+    "GIT_CONFIG_NOSYSTEM": "1",
+    "GIT_AUTHOR_NAME": "Test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+for _var in ("GIT_DIR", "GIT_WORK_TREE", "GIT_CEILING_DIRECTORIES", "GIT_INDEX_FILE"):
+    _GIT_TEST_ENV.pop(_var, None)
+
+
+def _run(cwd, *args):
+    return subprocess.run(
+        ["git", *args], cwd=str(cwd), env=_GIT_TEST_ENV, capture_output=True,
+    )
+
+
+def git(cwd, *args) -> str:
+    """Run git in cwd and return stripped stdout; raises if git fails."""
+    r = _run(cwd, *args)
+    if r.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)}: {r.stderr.decode()}")
+    return r.stdout.decode().strip()
+
+
+def git_bytes(cwd, *args) -> bytes:
+    """Raw stdout of a git command that must succeed."""
+    r = _run(cwd, *args)
+    assert r.returncode == 0, r.stderr
+    return r.stdout
+
+
+def rev_parse(cwd, *args) -> str:
+    """`git rev-parse <args>` stdout, or "" if it fails — what git_utils mirrors."""
+    try:
+        r = _run(cwd, "rev-parse", *args)
+    except OSError:
+        return ""  # cwd doesn't exist
+    return r.stdout.decode().strip() if r.returncode == 0 else ""
+
+
+def commit_file(repo, name: str, content: str, message: str = "") -> str:
+    path = repo / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    git(repo, "add", "--", name)
+    git(repo, "commit", "-q", "-m", message or f"add {name}")
+    return git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture(autouse=True)
+def _no_git_overrides(monkeypatch):
+    for var in ("GIT_DIR", "GIT_WORK_TREE", "GIT_CEILING_DIRECTORIES"):
+        monkeypatch.delenv(var, raising=False)
+
+
+@pytest.fixture
+def empty_repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    return repo
+
+
+@pytest.fixture
+def repo(empty_repo):
+    commit_file(empty_repo, "README.md", "hello\n", "initial")
+    return empty_repo
@@ -0,0 +1,114 @@
+"""Parsers for NUL-separated git output: commit-hook file list, PR diff and log.
+
+Expectations come from git itself (`--name-only -z`, `--stat`, `--format=%H`)
+so the parsers are checked against what git reports, including renames,
+binary files and paths with spaces, tabs or newlines.
+"""
+
+import pytest
+
+from conftest import commit_file, git, git_bytes
+from simple_provenance_tracker import git_hooks_helper
+
+
+ODD_NAMES = ["with space.txt", "tab\there.txt", "new\nline.txt", "ünïcode.txt"]
+
+
+def _names(raw: bytes):
+    return [f.decode("utf-8") for f in raw.split(b"\0") if f]
+
+
+@pytest.fixture
+def busy_repo(repo):
+    """A repo with a committed base of awkward file names and a binary file."""
+    for name in ODD_NAMES + ["keep.txt", "rename-me.txt"]:
+        (repo / name).write_text(f"{name}\n")
+    (repo / "blob.bin").write_bytes(b"\0\1\2")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "base")
+    return repo
+
+
+# ─── git_hooks_helper._git_changed_files ─────────────────────────────────────
+
+def test_changed_files_prefers_staged(busy_repo):
+    (busy_repo / "keep.txt").write_text("unstaged edit\n")
+    (busy_repo / "with space.txt").write_text("staged edit\n")
+    git(busy_repo, "add", "--", "with space.txt")
+    assert git_hooks_helper._git_changed_files(str(busy_repo)) == ["with space.txt"]
+
+
+def test_changed_files_falls_back_to_unstaged(busy_repo):
+    for name in ODD_NAMES:
+        (busy_repo / name).write_text("edited\n")
+    (busy_repo / "untracked.txt").write_text("ignored by the hook\n")
+    expected = _names(git_bytes(busy_repo, "diff", "--name-only", "-z", "HEAD"))
+    got = git_hooks_helper._git_changed_files(str(busy_repo))
+    assert got == expected
+    assert sorted(got) == sorted(ODD_NAMES)
+
+
+def test_changed_files_staged_rename(busy_repo):
+    git(busy_repo, "mv", "rename-me.txt", "renamed.txt")
+    assert git_hooks_helper._git_changed_files(str(busy_repo)) == ["renamed.txt"]
+
+
+def test_changed_files_clean_tree(busy_repo):
+    assert git_hooks_helper._git_changed_files(str(busy_repo)) == []
+
+
+def test_changed_files_not_a_repo(tmp_path):
+    assert git_hooks_helper._git_changed_files(str(tmp_path)) == []
+
+
+# ─── mcp_tools: `git diff --numstat --stat -z` and `git log -z` ──────────────
+
+@pytest.fixture
+def mcp_tools():
+    pytest.importorskip("mcp")
+    from simple_provenance_tracker import mcp_tools
+    return mcp_tools
+
+
+def test_diff_head_matches_git(mcp_tools, busy_repo):
+    for name in ODD_NAMES:
+        (busy_repo / name).write_text("edited\n")
+    (busy_repo / "blob.bin").write_bytes(b"\0\3\4")
+    git(busy_repo, "mv", "rename-me.txt", "renamed.txt")
+    (busy_repo / "keep.txt").write_text("staged\n")
+    git(busy_repo, "add", "keep.txt")
+
+    files, stat = mcp_tools._git_diff_head(str(busy_repo))
+
+    assert files == _names(git_bytes(busy_repo, "diff", "--name-only", "-z", "HEAD"))
+    assert "renamed.txt" in files and "rename-me.txt" not in files
+    assert stat == git(busy_repo, "diff", "--stat", "HEAD")
+
+
+def test_diff_head_clean_tree(mcp_tools, busy_repo):
+    assert mcp_tools._git_diff_head(str(busy_repo)) == ([], "")
+
+
+def test_pr_commits_match_git_log(mcp_tools, repo):
+    git(repo, "checkout", "-q", "-b", "feature")
+    subjects = ["plain", "pipe | in | subject", "tab\tand ünïcode", "trailing  spaces"]
+    for i, subject in enumerate(subjects):
+        commit_file(repo, f"f{i}.txt", f"{i}\n", subject)
+
+    commits = mcp_tools._get_pr_commits(str(repo), "main")
+
+    assert [c["hash"] for c in commits] == git(repo, "log", "--format=%H", "main..HEAD").split()
+    assert [c["subject"] for c in commits] == _names(
+        git_bytes(repo, "log", "-z", "--format=%s", "main..HEAD")
+    )
+    assert commits[2]["subject"] == "pipe | in | subject"
+    dates = git(repo, "log", "--format=%ai", "main..HEAD").splitlines()
+    assert [c["date"] for c in commits] == dates
+
+
+def test_pr_commits_empty_range(mcp_tools, repo):
+    assert mcp_tools._get_pr_commits(str(repo), "main") == []
+
+
+def test_pr_commits_unknown_base(mcp_tools, repo):
+    assert mcp_tools._get_pr_commits(str(repo), "no-such-branch") == []
@@ -0,0 +1,183 @@
+"""git_utils lookups must agree with `git rev-parse` on every repo layout.
+
+Each test runs against the .git file readers (pygit2 disabled) and, when
+it is installed, the pygit2 path.
+"""
+
+import os
+
+import pytest
+
+from conftest import commit_file, git, rev_parse
+from simple_provenance_tracker import git_utils
+
+
+@pytest.fixture(params=["files", "pygit2"])
+def backend(request, monkeypatch):
+    if request.param == "pygit2":
+        monkeypatch.setattr(git_utils, "pygit2", pytest.importorskip("pygit2"))
+    else:
+        monkeypatch.setattr(git_utils, "pygit2", None)
+    return request.param
+
+
+def _expected(directory):
+    root = rev_parse(directory, "--show-toplevel") or str(directory)
+    return {
+        "root": root,
+        "branch": rev_parse(root, "--abbrev-ref", "HEAD") or "unknown",
+        "sha": rev_parse(root, "HEAD"),
+    }
+
+
+def assert_matches_git(directory):
+    expected = _expected(directory)
+    directory = str(directory)
+    root = git_utils.repo_root(directory)
+    assert root == expected["root"]
+    assert git_utils.current_branch(root) == expected["branch"]
+    assert git_utils.head_commit(root) == expected["sha"]
+    assert git_utils.repo_and_branch(directory) == (expected["root"], expected["branch"])
+    # The .git readers must get it right on their own, not via the fallback
+    assert git_utils._find_toplevel(directory) == expected["root"]
+    assert git_utils._read_head_branch(root) == expected["branch"]
+    assert git_utils._read_head_sha(root) == expected["sha"]
+    return expected
+
+
+def test_plain_repo(backend, repo):
+    expected = assert_matches_git(repo)
+    assert expected["branch"] == "main"
+
+
+def test_subdirectory(backend, repo):
+    commit_file(repo, "pkg/sub/mod.py", "x = 1\n")
+    expected = assert_matches_git(repo / "pkg" / "sub")
+    assert expected["root"] == str(repo)
+
+
+def test_branch_with_slash(backend, repo):
+    git(repo, "checkout", "-q", "-b", "feature/nested/name")
+    assert assert_matches_git(repo)["branch"] == "feature/nested/name"
+
+
+def test_packed_refs(backend, repo):
+    git(repo, "checkout", "-q", "-b", "feature/packed")
+    commit_file(repo, "a.txt", "a\n")
+    git(repo, "pack-refs", "--all")
+    assert not (repo / ".git" / "refs" / "heads" / "feature" / "packed").exists()
+    expected = assert_matches_git(repo)
+    assert expected["branch"] == "feature/packed"
+
+
+def test_loose_ref_wins_over_stale_packed_ref(backend, repo):
+    git(repo, "pack-refs", "--all")
+    commit_file(repo, "b.txt", "b\n")  # Writes a loose ref newer than packed-refs
+    assert_matches_git(repo)
+
+
+def test_unborn_head(backend, empty_repo):
+    expected = assert_matches_git(empty_repo)
+    assert expected["branch"] == "unknown"
+    assert expected["sha"] == ""
+
+
+def test_detached_head(backend, repo):
+    first = git(repo, "rev-parse", "HEAD")
+    commit_file(repo, "c.txt", "c\n")
+    git(repo, "checkout", "-q", "--detach", first)
+    expected = assert_matches_git(repo)
+    assert expected["branch"] == "HEAD"
+    assert expected["sha"] == first
+
+
+def test_worktree(backend, repo, tmp_path):
+    wt = tmp_path / "wt"
+    git(repo, "worktree", "add", "-q", "-b", "wt-branch", str(wt))
+    commit_file(wt, "wt.txt", "w\n")
+    assert (wt / ".git").is_file()
+    expected = assert_matches_git(wt)
+    assert expected["root"] == str(wt)
+    assert expected["branch"] == "wt-branch"
+    # The main checkout is unaffected by the worktree's commit
+    assert_matches_git(repo)
+
+
+def test_worktree_packed_refs(backend, repo, tmp_path):
+    wt = tmp_path / "wt"
+    git(repo, "worktree", "add", "-q", "-b", "wt-packed", str(wt))
+    git(repo, "pack-refs", "--all")
+    assert assert_matches_git(wt)["branch"] == "wt-packed"
+
+
+def test_worktree_detached(backend, repo, tmp_path):
+    wt = tmp_path / "wt"
+    git(repo, "worktree", "add", "-q", "--detach", str(wt))
+    assert assert_matches_git(wt)["branch"] == "HEAD"
+
+
+def test_symlinked_directory(backend, repo, tmp_path):
+    (repo / "src").mkdir()
+    link = tmp_path / "link"
+    os.symlink(repo / "src", link)
+    expected = assert_matches_git(link)
+    assert expected["root"] == str(repo)
+
+
+def test_symlinked_repo(backend, repo, tmp_path):
+    link = tmp_path / "repo-link"
+    os.symlink(repo, link)
+    assert assert_matches_git(link)["root"] == str(repo)
+
+
+def test_not_a_repo(backend, tmp_path, monkeypatch):
+    plain = tmp_path / "plain"
+    plain.mkdir()
+    # Stop git (and the .git probe) from finding a repo above tmp_path
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path))
+    monkeypatch.setitem(git_utils.GIT_ENV, "GIT_CEILING_DIRECTORIES", str(tmp_path))
+    assert git_utils.repo_root(str(plain)) == str(plain)
+
+
+def test_missing_directory(backend, repo):
+    missing = repo / "does" / "not" / "exist"
+    assert git_utils.repo_root(str(missing)) == str(missing)
+
+
+# ─── File readers on their own ───────────────────────────────────────────────
+
+def test_find_toplevel_defers_inside_git_dir(repo):
+    assert git_utils._find_toplevel(str(repo / ".git")) == ""
+    assert git_utils._find_toplevel(str(repo / ".git" / "refs")) == ""
+
+
+def test_find_toplevel_defers_to_git_overrides(repo, monkeypatch):
+    monkeypatch.setenv("GIT_DIR", str(repo / ".git"))
+    assert git_utils._find_toplevel(str(repo)) == ""
+
+
+def test_read_head_unrecognised_git_file(tmp_path):
+    (tmp_path / ".git").write_text("not a gitdir line\n")
+    assert git_utils._read_head_sha(str(tmp_path)) == ""
+    assert git_utils._read_head_branch(str(tmp_path)) == ""
+
+
+def test_read_head_sha_ignores_non_sha(repo):
+    (repo / ".git" / "HEAD").write_text("garbage\n")
+    assert git_utils._read_head_sha(str(repo)) == ""
+    assert git_utils._read_head_branch(str(repo)) == ""
+
+
+def test_resolve_ref_missing(repo):
+    assert git_utils._resolve_ref(str(repo / ".git"), "refs/heads/nope") == ""
+
+
+@pytest.mark.parametrize("value,ok", [
+    ("a" * 40, True),
+    ("0123456789abcdef" * 4, True),  # SHA-256
+    ("A" * 40, False),
+    ("a" * 39, False),
+    ("ref: refs/heads/main", False),
+])
+def test_is_sha(value, ok):
+    assert git_utils._is_sha(value) is ok
@@ -0,0 +1,65 @@
+"""Backwards transcript reading in the prompt hook."""
+
+import json
+import random
+
+import pytest
+
+from simple_provenance_tracker import hook_record_prompt
+
+
+def _expected_tail(data: bytes):
+    """What _tail_lines should yield: every line, last first, as split() sees them."""
+    lines = data.split(b"\n")[::-1]
+    if lines[-1] == b"":
+        lines.pop()  # A leading newline produces no empty first line
+    return lines
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"one",
+    b"one\n",
+    b"\n",
+    b"\n\n",
+    b"\none\ntwo",
+    b"one\ntwo\nthree\n",
+    b"x" * 50 + b"\n" + b"y" * 50,
+])
+@pytest.mark.parametrize("block", [1, 2, 3, 7, 8192])
+def test_tail_lines_matches_split(tmp_path, data, block):
+    path = tmp_path / "t.jsonl"
+    path.write_bytes(data)
+    assert list(hook_record_prompt._tail_lines(str(path), block)) == _expected_tail(data)
+
+
+def test_tail_lines_random(tmp_path):
+    rng = random.Random(1234)
+    path = tmp_path / "t.jsonl"
+    for _ in range(200):
+        data = bytes(rng.choice(b"ab\n") for _ in range(rng.randint(0, 200)))
+        path.write_bytes(data)
+        for block in (1, 4, 16, 64):
+            assert list(hook_record_prompt._tail_lines(str(path), block)) == _expected_tail(data)
+
+
+def _line(entry) -> str:
+    return json.dumps(entry) + "\n"
+
+
+def test_prompt_from_transcript_skips_long_tool_result(tmp_path):
+    path = tmp_path / "t.jsonl"
+    path.write_text(
+        _line({"type": "user", "message": {"content": "older prompt"}})
+        + _line({"type": "user", "message": {"content": "latest prompt"}})
+        + _line({"type": "assistant", "message": {"content": "x" * 100_000}})
+        + _line({"type": "user", "message": {"content": [
+            {"type": "tool_result", "content": "y" * 100_000},
+        ]}})
+        + _line({"type": "user", "message": {"content": "[Request interrupted by user]"}})
+    )
+    assert hook_record_prompt._get_prompt_from_transcript(str(path)) == "latest prompt"
+
+
+def test_prompt_from_transcript_missing_file(tmp_path):
+    assert hook_record_prompt._get_prompt_from_transcript(str(tmp_path / "nope.jsonl")) == ""
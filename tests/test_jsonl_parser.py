@@ -0,0 +1,162 @@
+"""Incremental transcript parsing must match a from-scratch parse at every step."""
+
+import json
+import os
+
+import pytest
+
+from simple_provenance_tracker import jsonl_parser
+
+
+SESSION = "session-1"
+CWD = "/work/project"
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(jsonl_parser, "_session_state", {})
+    return tmp_path
+
+
+@pytest.fixture
+def transcript(home):
+    path = jsonl_parser.get_jsonl_path(CWD, SESSION)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"")
+    return path
+
+
+def _entries(i):
+    """One user prompt and one assistant turn with a few tool calls."""
+    return [
+        json.dumps({"type": "user", "timestamp": f"t{i}", "message": {"content": f"prompt {i}"}}),
+        json.dumps({
+            "type": "assistant",
+            "message": {"content": [
+                {"type": "tool_use", "name": "Read", "input": {"file_path": f"/r{i % 3}"}},
+                {"type": "tool_use", "name": "Edit", "input": {"file_path": f"/w{i}"}},
+                {"type": "tool_use", "name": "Bash", "input": {"command": f"cmd {i}"}},
+            ]},
+        }),
+    ]
+
+
+def _append(path, data: str):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(data)
+
+
+def _parse():
+    return jsonl_parser.parse_session_activity(SESSION, CWD)
+
+
+def _fresh_parse():
+    """Parse from scratch without disturbing the incremental state."""
+    saved = dict(jsonl_parser._session_state)
+    jsonl_parser._session_state.clear()
+    try:
+        return _parse()
+    finally:
+        jsonl_parser._session_state.clear()
+        jsonl_parser._session_state.update(saved)
+
+
+def test_appends_match_full_parse(transcript):
+    for i in range(20):
+        user, assistant = _entries(i)
+        _append(transcript, user + "\n")
+        assert _parse() == _fresh_parse()
+        _append(transcript, assistant + "\n")
+        assert _parse() == _fresh_parse()
+
+    result = _parse()
+    assert [p["text"] for p in result["human_prompts"]] == [f"prompt {i}" for i in range(20)]
+    assert result["tools_used"] == {"Read": 20, "Edit": 20, "Bash": 20}
+    assert result["files_read"] == {"/r0", "/r1", "/r2"}
+    assert len(result["files_written"]) == 20
+
+
+def test_unterminated_last_line(transcript):
+    user, assistant = _entries(0)
+    _append(transcript, user + "\n" + assistant)  # No trailing newline yet
+    first = _parse()
+    assert first == _fresh_parse()
+    assert first["tools_used"] == {"Read": 1, "Edit": 1, "Bash": 1}
+
+    # The complete line is counted once, not again when it is finished
+    _append(transcript, "\n")
+    assert _parse() == first
+
+
+def test_line_split_mid_write(transcript):
+    user, assistant = _entries(0)
+    _append(transcript, user + "\n" + assistant[:25])
+    partial = _parse()
+    assert partial["tools_used"] == {}
+    assert partial == _fresh_parse()
+
+    _append(transcript, assistant[25:] + "\n")
+    assert _parse() == _fresh_parse()
+    assert _parse()["tools_used"] == {"Read": 1, "Edit": 1, "Bash": 1}
+
+
+def test_truncated_file_is_reparsed(transcript):
+    for i in range(5):
+        _append(transcript, "\n".join(_entries(i)) + "\n")
+    _parse()
+
+    transcript.write_text(_entries(99)[0] + "\n")
+    result = _parse()
+    assert [p["text"] for p in result["human_prompts"]] == ["prompt 99"]
+    assert result == _fresh_parse()
+
+
+def test_replaced_with_older_file_is_reparsed(transcript):
+    _append(transcript, "\n".join(_entries(0)) + "\n")
+    st = os.stat(transcript)
+    _append(transcript, "\n".join(_entries(1)) + "\n")
+    _parse()
+
+    # Same size as before but an older mtime: treat as a different file
+    transcript.write_text("\n".join(_entries(2)) + "\n" + "\n".join(_entries(3)) + "\n")
+    os.utime(transcript, ns=(st.st_atime_ns, st.st_mtime_ns - 10**9))
+    assert _parse() == _fresh_parse()
+
+
+def test_results_are_not_shared_with_cache(transcript):
+    _append(transcript, "\n".join(_entries(0)) + "\n")
+    first = _parse()
+    first["files_read"].add("/mutated")
+    first["tools_used"]["Read"] = 99
+    first["human_prompts"].clear()
+    assert _parse() == _fresh_parse()
+    assert "/mutated" not in _parse()["files_read"]
+
+
+def test_meta_and_malformed_lines_are_skipped(transcript):
+    _append(transcript, "\n".join([
+        "{not json",
+        json.dumps({"type": "user", "message": {"content": "[Request interrupted by user]"}}),
+        json.dumps({"type": "user", "message": {"content": [
+            {"type": "text", "text": "<system-reminder>noise</system-reminder>"},
+            {"type": "text", "text": "real prompt"},
+        ]}}),
+        "   ",
+    ]) + "\n")
+    assert [p["text"] for p in _parse()["human_prompts"]] == ["real prompt"]
+
+
+def test_missing_transcript_has_same_shape(transcript):
+    _append(transcript, "\n".join(_entries(0)) + "\n")
+    present = _parse()
+    missing = jsonl_parser.parse_session_activity("no-such-session", CWD)
+
+    assert missing == {
+        "files_read": set(),
+        "files_written": set(),
+        "tools_used": {},
+        "bash_commands": [],
+        "human_prompts": [],
+    }
+    assert {k: type(v) for k, v in missing.items()} == {k: type(v) for k, v in present.items()}